@@ -0,0 +1,47 @@
+"""
+アンケートCSVの列スキーマ定義
+各スクリプトで共有する列の型定義と読み込み処理をまとめます。
+"""
+
+import pyarrow as pa
+import pyarrow.csv as pacsv
+from typing import Dict, Final, Tuple
+
+# E1~E3の自由記述設問の列名
+E1_COL: Final[str] = 'E1: 良かったところ（役に立った画面、助言、タイミングなど）'
+E2_COL: Final[str] = 'E2: 困ったところ・分かりにくかったところ'
+E3_COL: Final[str] = 'E3: 改善してほしい点・次のシステムへの期待'
+E_COLS: Final[Tuple[str, ...]] = (E1_COL, E2_COL, E3_COL)
+
+# pyarrow.csvに渡す列の型(型推論の走査を省略するため事前に宣言)
+ARROW_COLUMN_TYPES: Final[Dict[str, pa.DataType]] = {
+    'ユーザー番号': pa.int32(),
+    '氏名': pa.string(),
+    '学籍番号': pa.string(),
+    E1_COL: pa.string(),
+    E2_COL: pa.string(),
+    E3_COL: pa.string(),
+}
+
+# 自由記述欄は改行を含むため、引用符内の改行を許可する
+PARSE_OPTIONS: Final[pacsv.ParseOptions] = pacsv.ParseOptions(newlines_in_values=True)
+
+
+def read_survey_csv(csv_path: str) -> pa.Table:
+    """
+    pyarrowのマルチスレッドCSVパーサーでアンケートCSVを読み込む
+    
+    pandasのengine='pyarrow'は引用符内の改行に対応していないため、
+    pyarrow.csvを直接呼び出します。pandasへの変換は呼び出し側で行います。
+    
+    Args:
+        csv_path: CSVファイルのパス
+        
+    Returns:
+        Arrowテーブル
+    """
+    return pacsv.read_csv(
+        csv_path,
+        parse_options=PARSE_OPTIONS,
+        convert_options=pacsv.ConvertOptions(column_types=ARROW_COLUMN_TYPES)
+    )
@@ -4,12 +4,18 @@
 YAMLマッピングファイルを読み込み、CSVにユーザー番号列を追加してソートします。
 """
 
+import numpy as np
 import pandas as pd
 import yaml
 import sys
 from pathlib import Path
 from typing import Dict, Any
 
+from _schema import read_survey_csv
+
+# libyamlが利用可能であればCローダーを使用(なければ純Python実装にフォールバック)
+Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 
 def load_user_mapping(yaml_path: str) -> Dict[str, int]:
     """
@@ -28,65 +34,67 @@ def load_user_mapping(yaml_path: str) -> Dict[str, int]:
     print(f"📖 YAMLファイルを読み込み中: {yaml_path}")
     
     with open(yaml_path, 'r', encoding='utf-8') as f:
-        data = yaml.safe_load(f)
+        data = yaml.load(f, Loader=Loader)
     
     if not data:
         raise ValueError("YAMLファイルが空です")
     
-    # user_idを抽出してバリデーション
-    user_mapping = {}
-    errors = []
-    
-    for student_id, info in data.items():
-        # 学籍番号の空白を削除
-        student_id = str(student_id).strip()
-        
-        # user_idを取得
-        if not isinstance(info, dict):
-            errors.append(f"  ❌ {student_id}: 不正なデータ形式です")
-            continue
-            
-        user_id = info.get('user_id')
-        
-        # null チェック
-        if user_id is None:
-            errors.append(f"  ❌ {student_id}: user_idが設定されていません")
-            continue
-        
-        # 型チェック
-        if not isinstance(user_id, int):
-            errors.append(f"  ❌ {student_id}: user_idは整数である必要があります (現在: {type(user_id).__name__})")
-            continue
-        
-        # 範囲チェック
-        if user_id < 1 or user_id > 18:
-            errors.append(f"  ❌ {student_id}: user_idは1~18の範囲である必要があります (現在: {user_id})")
-            continue
-        
-        user_mapping[student_id] = user_id
+    # 学籍番号(空白を削除)とuser_idを配列にまとめ、一括でバリデーション
+    student_ids = [str(student_id).strip() for student_id in data]
+    infos = list(data.values())
+    n = len(infos)
+    uids = np.fromiter(
+        (info.get('user_id') if isinstance(info, dict) else None for info in infos),
+        dtype=object,
+        count=n
+    )
+    
+    # 形式・null・型チェック
+    is_dict = np.fromiter((isinstance(info, dict) for info in infos), dtype=bool, count=n)
+    is_none = np.fromiter((uid is None for uid in uids), dtype=bool, count=n)
+    is_int = np.fromiter((isinstance(uid, int) for uid in uids), dtype=bool, count=n)
+    bad_format = ~is_dict
+    missing = is_dict & is_none
+    bad_type = is_dict & ~is_none & ~is_int
+    
+    # 範囲チェック(整数の要素のみ)
+    out_of_range = np.zeros(n, dtype=bool)
+    out_of_range[is_int] = (uids[is_int] < 1) | (uids[is_int] > 18)
     
     # エラーがあれば表示して終了
-    if errors:
+    invalid = bad_format | missing | bad_type | out_of_range
+    if invalid.any():
         print("\n⚠️  バリデーションエラーが見つかりました:\n")
-        for error in errors:
-            print(error)
-        raise ValueError(f"{len(errors)}件のエラーがあります")
+        for i in np.flatnonzero(invalid):
+            student_id = student_ids[i]
+            if bad_format[i]:
+                print(f"  ❌ {student_id}: 不正なデータ形式です")
+            elif missing[i]:
+                print(f"  ❌ {student_id}: user_idが設定されていません")
+            elif bad_type[i]:
+                print(f"  ❌ {student_id}: user_idは整数である必要があります (現在: {type(uids[i]).__name__})")
+            else:
+                print(f"  ❌ {student_id}: user_idは1~18の範囲である必要があります (現在: {uids[i]})")
+        raise ValueError(f"{int(invalid.sum())}件のエラーがあります")
+    
+    user_mapping = dict(zip(student_ids, uids.tolist()))
+    
+    # user_id -> 学籍番号リストの逆引きを1回の走査で構築
+    uid_to_students = {}
+    for sid, uid in user_mapping.items():
+        uid_to_students.setdefault(uid, []).append(sid)
     
     # 重複チェック
-    user_ids = list(user_mapping.values())
-    duplicates = [uid for uid in set(user_ids) if user_ids.count(uid) > 1]
+    duplicates = {uid: sids for uid, sids in uid_to_students.items() if len(sids) > 1}
     
     if duplicates:
         print("\n⚠️  user_idの重複が見つかりました:\n")
-        for uid in duplicates:
-            students = [sid for sid, u in user_mapping.items() if u == uid]
-            print(f"  ❌ user_id={uid}: {', '.join(students)}")
+        for uid, sids in duplicates.items():
+            print(f"  ❌ user_id={uid}: {', '.join(sids)}")
         raise ValueError(f"{len(duplicates)}件の重複があります")
     
     # 欠損チェック(1~18がすべて存在するか)
-    expected_ids = set(range(1, 19))
-    actual_ids = set(user_ids)
-    missing_ids = expected_ids - actual_ids
+    missing_ids = set(range(1, 19)) - uid_to_students.keys()
     
     if missing_ids:
         print(f"\n⚠️  未使用のuser_idがあります: {sorted(missing_ids)}")
@@ -106,39 +114,46 @@ def add_user_id_and_sort(csv_path: str, user_mapping: Dict[str, int], output_pat
         output_path: 出力CSVファイルのパス
     """
     print(f"\n📖 CSVファイルを読み込み中: {csv_path}")
-    df = pd.read_csv(csv_path)
+    df = read_survey_csv(csv_path).to_pandas(types_mapper=pd.ArrowDtype)
     
-    # 学籍番号の空白を削除
-    df['学籍番号'] = df['学籍番号'].astype(str).str.strip()
+    # 学籍番号の空白を削除(読み込み時に文字列型で宣言済みのためastype不要)
+    df['学籍番号'] = df['学籍番号'].str.strip()
     
     # ユーザー番号を追加
     print("🔢 ユーザー番号を追加中...")
-    df['ユーザー番号'] = df['学籍番号'].map(user_mapping)
-    
-    # マッピングできなかった行をチェック
-    unmapped = df[df['ユーザー番号'].isna()]
-    if len(unmapped) > 0:
+    # 学籍番号をマッピングのキーをカテゴリとするCategoricalに変換し、整数コードで引く
+    keys = np.array(list(user_mapping.keys()), dtype=object)
+    vals = np.array(list(user_mapping.values()), dtype=np.int32)
+    codes = pd.Categorical(df['学籍番号'], categories=keys).codes
+    
+    # マッピングできなかった行をチェック(コード-1が未登録)
+    mask = codes == -1
+    if mask.any():
         print("\n⚠️  以下の学籍番号がYAMLファイルに存在しません:")
-        for _, row in unmapped.iterrows():
-            print(f"  ❌ {row['学籍番号']} ({row['氏名']})")
-        raise ValueError(f"{len(unmapped)}件の学籍番号がマッピングされていません")
+        unmapped_ids = df.loc[mask, '学籍番号'].to_numpy()
+        unmapped_names = df.loc[mask, '氏名'].to_numpy()
+        for student_id, name in zip(unmapped_ids, unmapped_names):
+            print(f"  ❌ {student_id} ({name})")
+        raise ValueError(f"{int(mask.sum())}件の学籍番号がマッピングされていません")
     
-    # ユーザー番号を整数型に変換
-    df['ユーザー番号'] = df['ユーザー番号'].astype(int)
+    # ユーザー番号を整数型で追加
+    df['ユーザー番号'] = vals[codes]
     
     # ユーザー番号順にソート
     print("📊 ユーザー番号順にソート中...")
-    df = df.sort_values('ユーザー番号').reset_index(drop=True)
+    # 整数キー1列なのでnumpyの安定ソートで並び順を求め、各ブロックをtakeで並べ替える
+    # (インデックスはto_csv(index=False)で出力しないため振り直さない)
+    order = np.argsort(df['ユーザー番号'].to_numpy(), kind='stable')
+    df = df.take(order)
     
     # 列の順序を変更(ユーザー番号を1列目に)
-    cols = ['ユーザー番号'] + [col for col in df.columns if col != 'ユーザー番号']
-    df = df[cols]
+    df.insert(0, 'ユーザー番号', df.pop('ユーザー番号'))
     
     # 出力ディレクトリを作成
     output_dir = Path(output_path).parent
     output_dir.mkdir(parents=True, exist_ok=True)
     
-    # CSVに書き込み
+    # CSVに書き込み(既存の出力と同じ書式を保つためpandasで出力)
     print(f"\n💾 出力ファイルを保存中: {output_path}")
     df.to_csv(output_path, index=False, encoding='utf-8')
     
@@ -9,6 +9,11 @@ import yaml
 import sys
 from pathlib import Path
 
+from _schema import read_survey_csv
+
+# libyamlが利用可能であればCダンパーを使用(なければ純Python実装にフォールバック)
+Dumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
 
 def generate_template(csv_path: str, output_path: str):
     """
@@ -21,37 +26,36 @@ def generate_template(csv_path: str, output_path: str):
     try:
         # CSVを読み込み
         print(f"📖 CSVファイルを読み込み中: {csv_path}")
-        df = pd.read_csv(csv_path)
+        df = read_survey_csv(csv_path).to_pandas(types_mapper=pd.ArrowDtype)
         
-        # 学籍番号と氏名を抽出(空白削除)
-        df['学籍番号'] = df['学籍番号'].astype(str).str.strip()
+        # 学籍番号と氏名を抽出(空白削除、読み込み時に文字列型で宣言済み)
+        df['学籍番号'] = df['学籍番号'].str.strip()
         students = df[['学籍番号', '氏名']].drop_duplicates()
         
         # 学籍番号でソート
-        students = students.sort_values('学籍番号').reset_index(drop=True)
+        students = students.sort_values('学籍番号', ignore_index=True)
         
         print(f"✅ {len(students)}件の学籍番号を抽出しました")
         
         # ユーザーIDマッピングを作成(学籍番号順に1~18を仮設定)
-        user_mapping = {}
-        for idx, row in students.iterrows():
-            student_id = row['学籍番号']
-            name = row['氏名']
-            user_id = idx + 1  # 1から開始
-            
-            # コメント付きで保存
-            user_mapping[student_id] = {
-                'user_id': user_id,
+        # (iterrowsを使わず列の配列を直接zipして構築)
+        student_ids = students['学籍番号'].to_numpy()
+        names = students['氏名'].to_numpy()
+        user_mapping = {
+            student_id: {
+                'user_id': i + 1,  # 1から開始
                 'name': name  # 参考情報として氏名を含める
             }
+            for i, (student_id, name) in enumerate(zip(student_ids, names))
+        }
         
         # 出力ディレクトリを作成
         output_dir = Path(output_path).parent
         output_dir.mkdir(parents=True, exist_ok=True)
         
-        # YAMLファイルに書き込み
+        # YAMLファイルに書き込み(1MiBのバッファで細かいwriteをまとめる)
         print(f"💾 YAMLテンプレートを生成中: {output_path}")
-        with open(output_path, 'w', encoding='utf-8') as f:
+        with open(output_path, 'w', encoding='utf-8', buffering=1 << 20) as f:
             # ヘッダーコメント
             f.write("# ユーザーIDマッピング設定ファイル\n")
             f.write("# 各学籍番号に対して1~18のユーザーIDを設定してください\n")
@@ -64,7 +68,8 @@ def generate_template(csv_path: str, output_path: str):
                 f,
                 allow_unicode=True,
                 default_flow_style=False,
-                sort_keys=False
+                sort_keys=False,
+                Dumper=Dumper
             )
         
         print(f"✨ テンプレート生成完了!")
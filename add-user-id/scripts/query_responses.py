@@ -3,72 +3,137 @@
 ユーザー番号からE1~E3の質問回答を取得するスクリプト
 """
 
-import pandas as pd
+import hashlib
+import os
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.feather as feather
 import sys
 from pathlib import Path
+from typing import Final, Optional, Tuple
 
+from _schema import ARROW_COLUMN_TYPES, E1_COL, E2_COL, E3_COL, E_COLS, PARSE_OPTIONS
 
-def get_user_responses(csv_path: str, user_id: int):
+# 表示に必要な列(この列のみを読み込む)
+QUERY_COLUMNS: Final[Tuple[str, ...]] = ('ユーザー番号', '氏名', '学籍番号', *E_COLS)
+
+
+def load_responses_table(csv_path: str, columns: Tuple[str, ...], cache_dir: Optional[str] = None) -> pa.Table:
+    """
+    CSVの指定列をArrowテーブルとして読み込む(Feather形式のキャッシュ付き)
+    
+    キャッシュはCSVのパス・更新時刻・サイズと列名から作ったキーで管理し、
+    CSVが変更されるまでは解析済みのテーブルを再利用します。
+    
+    Args:
+        csv_path: CSVファイルのパス
+        columns: 読み込む列名のタプル
+        cache_dir: キャッシュの保存先ディレクトリ(Noneならキャッシュしない)
+        
+    Returns:
+        指定列のみを含むArrowテーブル
+    """
+    stat = os.stat(csv_path)
+    cache_path = None
+    if cache_dir is not None:
+        key = f"{os.path.abspath(csv_path)}:{stat.st_mtime_ns}:{stat.st_size}:{columns}"
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+        cache_path = Path(cache_dir) / f"survey_cache_{digest}.feather"
+        if cache_path.exists():
+            try:
+                table = feather.read_table(cache_path)
+                print(f"⚡ キャッシュを使用: {cache_path}")
+                return table
+            except (pa.ArrowInvalid, OSError):
+                # 壊れたキャッシュは削除してCSVから読み直す
+                cache_path.unlink(missing_ok=True)
+    
+    print(f"📖 CSVファイルを読み込み中: {csv_path}")
+    convert_options = pacsv.ConvertOptions(
+        column_types=ARROW_COLUMN_TYPES,
+        include_columns=columns
+    )
+    table = pacsv.read_csv(csv_path, parse_options=PARSE_OPTIONS, convert_options=convert_options)
+    
+    if cache_path is not None:
+        tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            # 古いキャッシュを削除
+            for old_cache in cache_path.parent.glob("survey_cache_*.feather"):
+                if old_cache != cache_path:
+                    old_cache.unlink(missing_ok=True)
+            # 一時ファイルに書き出してから置き換え(書き込み途中のファイルを残さない)
+            feather.write_feather(table, tmp_path)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            tmp_path.unlink(missing_ok=True)
+            print(f"⚠️  キャッシュを保存できませんでした: {e}")
+    
+    return table
+
+
+def get_user_responses(csv_path: str, user_id: int, cache_dir: Optional[str] = None):
     """
     指定されたユーザー番号のE1~E3の回答を取得して表示
     
     Args:
         csv_path: CSVファイルのパス
         user_id: ユーザー番号(1~18)
+        cache_dir: 解析済みCSVのキャッシュ保存先(Noneならキャッシュしない)
     """
     try:
-        # CSVを読み込み
-        print(f"📖 CSVファイルを読み込み中: {csv_path}")
-        df = pd.read_csv(csv_path)
+        # CSVを読み込み(表示に必要な列のみ、キャッシュがあれば再利用)
+        table = load_responses_table(csv_path, QUERY_COLUMNS, cache_dir)
         
-        # ユーザー番号でフィルタ
-        user_data = df[df['ユーザー番号'] == user_id]
+        # ユーザー番号でフィルタ(Arrow上で絞り込む)
+        user_data = table.filter(pc.equal(table['ユーザー番号'], user_id))
         
-        if len(user_data) == 0:
+        if user_data.num_rows == 0:
             print(f"\n❌ エラー: ユーザー番号 {user_id} が見つかりません")
-            print(f"有効なユーザー番号: {sorted(df['ユーザー番号'].unique().tolist())}")
+            print(f"有効なユーザー番号: {sorted(pc.unique(table['ユーザー番号']).to_pylist())}")
             return False
         
-        # 最初の行を取得
-        row = user_data.iloc[0]
+        # 最初の行の値を列から直接取得(行全体をSeriesに変換しない)
+        name = user_data['氏名'][0].as_py()
+        student_id = user_data['学籍番号'][0].as_py()
+        e1_response = user_data[E1_COL][0].as_py()
+        e2_response = user_data[E2_COL][0].as_py()
+        e3_response = user_data[E3_COL][0].as_py()
         
-        # E1~E3の列名を取得
-        e1_col = 'E1: 良かったところ（役に立った画面、助言、タイミングなど）'
-        e2_col = 'E2: 困ったところ・分かりにくかったところ'
-        e3_col = 'E3: 改善してほしい点・次のシステムへの期待'
+        # 結果を組み立てて一度に出力
+        lines = []
+        lines.append("\n" + "="*80)
+        lines.append(f"👤 ユーザー番号: {user_id}")
+        lines.append(f"👤 氏名: {name}")
+        lines.append(f"🆔 学籍番号: {student_id}")
+        lines.append("="*80)
         
-        # 結果を表示
-        print("\n" + "="*80)
-        print(f"👤 ユーザー番号: {user_id}")
-        print(f"👤 氏名: {row['氏名']}")
-        print(f"🆔 学籍番号: {row['学籍番号']}")
-        print("="*80)
-        
-        print(f"\n📝 {e1_col}")
-        print("-"*80)
-        e1_response = row[e1_col]
-        if pd.isna(e1_response) or str(e1_response).strip() == '':
-            print("(回答なし)")
+        lines.append(f"\n📝 {E1_COL}")
+        lines.append("-"*80)
+        if not (e1_response or '').strip():
+            lines.append("(回答なし)")
         else:
-            print(e1_response)
+            lines.append(e1_response)
         
-        print(f"\n📝 {e2_col}")
-        print("-"*80)
-        e2_response = row[e2_col]
-        if pd.isna(e2_response) or str(e2_response).strip() == '':
-            print("(回答なし)")
+        lines.append(f"\n📝 {E2_COL}")
+        lines.append("-"*80)
+        if not (e2_response or '').strip():
+            lines.append("(回答なし)")
         else:
-            print(e2_response)
+            lines.append(e2_response)
         
-        print(f"\n📝 {e3_col}")
-        print("-"*80)
-        e3_response = row[e3_col]
-        if pd.isna(e3_response) or str(e3_response).strip() == '':
-            print("(回答なし)")
+        lines.append(f"\n📝 {E3_COL}")
+        lines.append("-"*80)
+        if not (e3_response or '').strip():
+            lines.append("(回答なし)")
         else:
-            print(e3_response)
+            lines.append(e3_response)
+        
+        lines.append("\n" + "="*80)
         
-        print("\n" + "="*80)
+        sys.stdout.write('\n'.join(lines) + '\n')
         
         return True
         
@@ -105,8 +170,9 @@ def main():
         sys.exit(1)
     
     csv_path = "/app/output/システムアンケート回答_ユーザー番号付き.csv"
+    cache_dir = "/app/cache"
     
-    success = get_user_responses(csv_path, user_id)
+    success = get_user_responses(csv_path, user_id, cache_dir)
     sys.exit(0 if success else 1)
 
 